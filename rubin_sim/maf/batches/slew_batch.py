@@ -3,7 +3,8 @@
 
 __all__ = ("slewBasics",)
 
-import numpy as np
+import functools
+import math
 
 import rubin_sim.maf.metric_bundles as mb
 import rubin_sim.maf.metrics as metrics
@@ -12,6 +13,68 @@ import rubin_sim.maf.slicers as slicers
 from .col_map_dict import col_map_dict
 from .common import standard_metrics
 
+# Slew distance histogram binning, for degree and radian columns.
+_DIST_BIN_SIZE_DEG, _DIST_BIN_SIZE_RAD = 2.0, math.radians(2.0)
+_DIST_BIN_MAX_DEG, _DIST_BIN_MAX_RAD = 20.0, math.radians(20.0)
+
+# UniSlicer carries no per-bundle state (setup_slicer only records which rows
+# to return), so one instance is shared by every slew statistics bundle.
+_UNI_SLICER = slicers.UniSlicer()
+
+
+@functools.lru_cache(maxsize=None)
+def _default_colmap():
+    """Return the default column map, built once and then reused.
+
+    The returned dictionary is shared between calls and must not be modified.
+    """
+    return col_map_dict()
+
+
+def _oned_slicer(col, bin_size, bin_min=None, bin_max=None):
+    """Return a new OneDSlicer on col with the given binning.
+
+    A fresh slicer is returned on each call: OneDSlicer.setup_slicer maps
+    the data into its bins, so instances must not be shared between bundles.
+    """
+    return slicers.OneDSlicer(slice_col_name=col, bin_size=bin_size, bin_min=bin_min, bin_max=bin_max)
+
+
+def _slew_bundles(specs, sql_constraint, run_name):
+    """Build the slew MetricBundles, numbering their display order.
+
+    Parameters
+    ----------
+    specs : `list` [`tuple`]
+        One (metric, slicer, info_label, caption, plot_dict) tuple per
+        bundle, in display order.
+    sql_constraint : `str` or None
+        SQL constraint shared by all of the bundles.
+    run_name : `str`
+        The name of the simulated survey.
+
+    Returns
+    -------
+    bundle_list : `list` [`maf.MetricBundle`]
+    """
+    return [
+        mb.MetricBundle(
+            metric,
+            slicer,
+            sql_constraint,
+            run_name=run_name,
+            info_label=info_label,
+            plot_dict=plot_dict,
+            display_dict={
+                "group": "Slew",
+                "subgroup": "Slew Basics",
+                "order": order,
+                "caption": caption,
+            },
+        )
+        for order, (metric, slicer, info_label, caption, plot_dict) in enumerate(specs)
+    ]
+
 
 def slewBasics(colmap=None, run_name="opsim", sql_constraint=None):
     """Generate a simple set of statistics about the slew times and distances.
@@ -31,117 +94,83 @@ def slewBasics(colmap=None, run_name="opsim", sql_constraint=None):
     """
 
     if colmap is None:
-        colmap = col_map_dict()
-
-    bundleList = []
+        colmap = _default_colmap()
+    slewtime = colmap["slewtime"]
+    slewdist = colmap["slewdist"]
 
     # Calculate basic stats on slew times. (mean/median/min/max + total).
-    slicer = slicers.UniSlicer()
-
-    info_label = "All visits"
-    if sql_constraint is not None and len(sql_constraint) > 0:
-        info_label = "%s" % (sql_constraint)
-    displayDict = {
-        "group": "Slew",
-        "subgroup": "Slew Basics",
-        "order": -1,
-        "caption": None,
-    }
-    # Add total number of slews.
-    metric = metrics.CountMetric(colmap["slewtime"], metric_name="Slew Count")
-    displayDict["caption"] = "Total number of slews recorded."
-    displayDict["order"] += 1
-    bundle = mb.MetricBundle(metric, slicer, sql_constraint, info_label=info_label, display_dict=displayDict)
-    bundleList.append(bundle)
-    for metric in standard_metrics(colmap["slewtime"]):
-        displayDict["caption"] = "%s in seconds." % (metric.name)
-        displayDict["order"] += 1
-        bundle = mb.MetricBundle(
-            metric,
+    slicer = _UNI_SLICER
+    info_label = sql_constraint if sql_constraint else "All visits"
+    # Add total number of slews, then the standard metrics.
+    specs = [
+        (
+            metrics.CountMetric(slewtime, metric_name="Slew Count"),
             slicer,
-            sql_constraint,
-            info_label=info_label,
-            display_dict=displayDict,
+            info_label,
+            "Total number of slews recorded.",
+            None,
         )
-        bundleList.append(bundle)
-
-    # Slew Time histogram.
-    slicer = slicers.OneDSlicer(slice_col_name=colmap["slewtime"], bin_size=2)
-    metric = metrics.CountMetric(col=colmap["slewtime"], metric_name="Slew Time Histogram")
-    info_label = "All visits"
-    plotDict = {"log_scale": True, "ylabel": "Count"}
-    displayDict["caption"] = "Histogram of slew times (seconds) for all visits."
-    displayDict["order"] += 1
-    bundle = mb.MetricBundle(
-        metric,
-        slicer,
-        sql_constraint,
-        info_label=info_label,
-        plot_dict=plotDict,
-        display_dict=displayDict,
-    )
-    bundleList.append(bundle)
-    # Zoom in on slew time histogram near 0.
-    slicer = slicers.OneDSlicer(slice_col_name=colmap["slewtime"], bin_size=0.2, bin_min=0, bin_max=20)
-    metric = metrics.CountMetric(col=colmap["slewtime"], metric_name="Zoom Slew Time Histogram")
-    info_label = "All visits"
-    plotDict = {"log_scale": True, "ylabel": "Count"}
-    displayDict["caption"] = "Histogram of slew times (seconds) for all visits (zoom)."
-    displayDict["order"] += 1
-    bundle = mb.MetricBundle(
-        metric,
-        slicer,
-        sql_constraint,
-        info_label=info_label,
-        plot_dict=plotDict,
-        display_dict=displayDict,
-    )
-    bundleList.append(bundle)
+    ]
+    specs += [
+        (metric, slicer, info_label, f"{metric.name} in seconds.", None)
+        for metric in standard_metrics(slewtime)
+    ]
 
+    # Slew time histogram, full range and zoomed in near 0.
+    # Each entry is (column, bin_size, bin_min, bin_max, metric_name, caption).
+    hist_specs = [
+        (
+            slewtime,
+            2,
+            None,
+            None,
+            "Slew Time Histogram",
+            "Histogram of slew times (seconds) for all visits.",
+        ),
+        (
+            slewtime,
+            0.2,
+            0,
+            20,
+            "Zoom Slew Time Histogram",
+            "Histogram of slew times (seconds) for all visits (zoom).",
+        ),
+    ]
     # Slew distance histogram, if available.
-    if colmap["slewdist"] is not None:
-        bin_size = 2.0
-        if not colmap["raDecDeg"]:
-            bin_size = np.radians(bin_size)
-        slicer = slicers.OneDSlicer(slice_col_name=colmap["slewdist"], bin_size=bin_size)
-        metric = metrics.CountMetric(col=colmap["slewdist"], metric_name="Slew Distance Histogram")
-        plotDict = {"log_scale": True, "ylabel": "Count"}
-        displayDict["caption"] = "Histogram of slew distances (angle) for all visits."
-        displayDict["order"] += 1
-        bundle = mb.MetricBundle(
-            metric,
-            slicer,
-            sql_constraint,
-            info_label=info_label,
-            plot_dict=plotDict,
-            display_dict=displayDict,
-        )
-        bundleList.append(bundle)
-        # Zoom on slew distance histogram.
-        bin_max = 20.0
-        if not colmap["raDecDeg"]:
-            bin_max = np.radians(bin_max)
-        slicer = slicers.OneDSlicer(
-            slice_col_name=colmap["slewdist"],
-            bin_size=bin_size / 10.0,
-            bin_min=0,
-            bin_max=bin_max,
-        )
-        metric = metrics.CountMetric(col=colmap["slewdist"], metric_name="Zoom Slew Distance Histogram")
-        plotDict = {"log_scale": True, "ylabel": "Count"}
-        displayDict["caption"] = "Histogram of slew distances (angle) for all visits."
-        displayDict["order"] += 1
-        bundle = mb.MetricBundle(
-            metric,
-            slicer,
-            sql_constraint,
-            info_label=info_label,
-            plot_dict=plotDict,
-            display_dict=displayDict,
+    if slewdist is not None:
+        if colmap["raDecDeg"]:
+            dist_bin_size, dist_bin_max = _DIST_BIN_SIZE_DEG, _DIST_BIN_MAX_DEG
+        else:
+            dist_bin_size, dist_bin_max = _DIST_BIN_SIZE_RAD, _DIST_BIN_MAX_RAD
+        hist_specs += [
+            (
+                slewdist,
+                dist_bin_size,
+                None,
+                None,
+                "Slew Distance Histogram",
+                "Histogram of slew distances (angle) for all visits.",
+            ),
+            (
+                slewdist,
+                dist_bin_size / 10.0,
+                0,
+                dist_bin_max,
+                "Zoom Slew Distance Histogram",
+                "Histogram of slew distances (angle) for all visits.",
+            ),
+        ]
+
+    plotDict = {"log_scale": True, "ylabel": "Count"}
+    specs += [
+        (
+            metrics.CountMetric(col=col, metric_name=metric_name),
+            _oned_slicer(col, bin_size, bin_min=bin_min, bin_max=bin_max),
+            "All visits",
+            caption,
+            plotDict,
         )
-        bundleList.append(bundle)
+        for col, bin_size, bin_min, bin_max, metric_name, caption in hist_specs
+    ]
 
-    # Set the run_name for all bundles and return the bundleDict.
-    for b in bundleList:
-        b.set_run_name(run_name)
-    return mb.make_bundles_dict_from_list(bundleList)
+    return mb.make_bundles_dict_from_list(_slew_bundles(specs, sql_constraint, run_name))
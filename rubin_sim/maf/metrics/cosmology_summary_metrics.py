@@ -5,16 +5,14 @@ __all__ = (
     "MultibandMeanzBiasMetric",
 )
 
+import functools
+import logging
 import warnings
 
 import healpy as hp
 import numpy as np
 from scipy import interpolate
-from scipy.stats import median_abs_deviation
-from astropy import units as u
-from astropy.coordinates import SkyCoord
 from sklearn.cluster import KMeans
-from copy import deepcopy
 
 from ..maf_contrib.static_probes_fom_summary_metric import StaticProbesFoMEmulatorMetric
 from .area_summary_metrics import AreaThresholdMetric
@@ -25,6 +23,83 @@ from .simple_metrics import RmsMetric
 # These generally calculate a FoM for various DESC metrics.
 
 
+@functools.lru_cache(maxsize=8)
+def _dipole_basis(nside):
+    """The (npix, 4) monopole and dipole basis [1, x, y, z] of the
+    (RING ordered) healpix pixels. The returned array is shared,
+    so is read-only.
+    """
+    npix = hp.nside2npix(nside)
+    basis = np.ones((npix, 4))
+    basis[:, 1:] = np.transpose(hp.pix2vec(nside, np.arange(npix)))
+    basis.flags.writeable = False
+    return basis
+
+
+def _remove_monopole_dipole(maps, good, remove_dipole=True):
+    """Subtract the monopole (and optionally the dipole) from each of
+    a stack of (RING ordered) healpix maps, fitting only the good pixels.
+
+    As with hp.remove_monopole followed by hp.remove_dipole, the mean is
+    removed first and then the best-fit monopole and dipole, but maps which
+    share a mask are fit with a single least-squares call.
+    Bad pixels are returned unchanged.
+    """
+    maps = np.atleast_2d(maps)
+    good = np.broadcast_to(good, maps.shape)
+    mono = np.sum(maps, axis=1, where=good) / np.count_nonzero(good, axis=1)
+    maps = np.where(good, maps - mono[:, np.newaxis], maps)
+    if not remove_dipole:
+        return maps
+    basis = _dipole_basis(hp.npix2nside(maps.shape[1]))
+    if (good == good[0]).all():
+        coefs = np.linalg.lstsq(basis[good[0]], maps[:, good[0]].T, rcond=None)[0]
+        fit = (basis @ coefs).T
+    else:
+        fit = np.array([basis @ np.linalg.lstsq(basis[g], m[g], rcond=None)[0] for m, g in zip(maps, good)])
+    return np.where(good, maps - fit, maps)
+
+
+def _alm_total_power(alms, lmax, lmin, lmax_per_map):
+    """Sum C_ell * (2 ell + 1) over lmin <= ell <= lmax_per_map[i]
+    for each row of a stack of alms (computed up to lmax).
+    """
+    ell, emm = hp.Alm.getlm(lmax)
+    # Only m >= 0 is stored; each m > 0 term also stands in for -m.
+    power = np.abs(alms) ** 2 * np.where(emm == 0, 1.0, 2.0)
+    in_range = (ell >= lmin) & (ell <= np.reshape(lmax_per_map, (-1, 1)))
+    return np.sum(power * in_range, axis=1)
+
+
+@functools.lru_cache(maxsize=8)
+def _pix_ra_dec(nside):
+    """RA and dec (degrees) of the centers of the (RING ordered)
+    healpix pixels. The returned arrays are shared, so are read-only.
+    """
+    theta, phi = hp.pix2ang(nside, np.arange(hp.nside2npix(nside)))
+    # theta is 0 at the north pole, pi/2 at equator, pi at south pole;
+    # phi maps to RA
+    ra = np.rad2deg(phi)
+    dec = np.rad2deg(0.5 * np.pi - theta)
+    ra.flags.writeable = False
+    dec.flags.writeable = False
+    return ra, dec
+
+
+@functools.lru_cache(maxsize=8)
+def _galactic_north_mask(nside):
+    """Mask of the (RING ordered, equatorial) healpix pixels
+    with galactic latitude b >= 0. The returned mask is shared,
+    so is read-only.
+    """
+    xyz = np.asarray(hp.pix2vec(nside, np.arange(hp.nside2npix(nside))))
+    # Only the galactic z component is needed, from the last row
+    # of the equatorial to galactic rotation matrix.
+    ngp_mask = hp.Rotator(coord=["C", "G"]).mat[2] @ xyz >= 0
+    ngp_mask.flags.writeable = False
+    return ngp_mask
+
+
 class TotalPowerMetric(BaseMetric):
     """Calculate the total power in the angular power spectrum,
     between lmin/lmax.
@@ -65,18 +140,23 @@ class TotalPowerMetric(BaseMetric):
         self.remove_monopole = remove_monopole
         self.remove_dipole = remove_dipole
         super().__init__(col=col, mask_val=mask_val, **kwargs)
+        # The ell values (lmin <= ell <= lmax) summed into the total power
+        self._ells = np.arange(np.ceil(lmin), np.floor(lmax) + 1).astype(int)
 
     def run(self, data_slice, slice_point=None):
-        # Calculate the power spectrum.
         data = data_slice[self.colname]
-        if self.remove_monopole:
-            data = hp.remove_monopole(data, verbose=False, bad=self.mask_val)
-        if self.remove_dipole:
-            data = hp.remove_dipole(data, verbose=False, bad=self.mask_val)
-        cl = hp.anafast(data)
-        ell = np.arange(np.size(cl))
-        condition = np.where((ell <= self.lmax) & (ell >= self.lmin))[0]
-        totalpower = np.sum(cl[condition] * (2 * ell[condition] + 1))
+        good = (data != self.mask_val) & np.isfinite(data)
+        # There is no power in a completely masked map.
+        if not good.any():
+            return 0.0
+        if self.remove_monopole or self.remove_dipole:
+            # hp.remove_dipole also removes the monopole
+            data = _remove_monopole_dipole(data, good, remove_dipole=self.remove_dipole)[0]
+        # Calculate the power spectrum, only as far as needed.
+        lmax = min(int(np.floor(self.lmax)), 3 * hp.npix2nside(data.size) - 1)
+        cl = hp.anafast(data, lmax=lmax)
+        ell = self._ells[self._ells <= lmax]
+        totalpower = np.sum(cl[ell] * (2 * ell + 1))
         return totalpower
 
 
@@ -110,68 +190,110 @@ class StaticProbesFoMEmulatorMetricSimple(BaseMetric):
     output of Exgalm5_with_cuts.
     """
 
-    def __init__(self, year=10, **kwargs):
-        self.year = year
-        super().__init__(col="metricdata", mask_val=-666, **kwargs)
-
-    def run(self, data_slice, slice_point=None):
-        # derive nside from length of data slice
-        nside = hp.npix2nside(len(data_slice))
-        pix_area = hp.nside2pixarea(nside, degrees=True)
-
-        # Chop off any outliers (and also the masked value)
-        good_pix = np.where(data_slice[self.col] > 0)[0]
-
-        # Calculate area and med depth from
-        area = pix_area * np.size(good_pix)
-        median_depth = np.median(data_slice[self.col][good_pix])
-
-        # FoM is calculated at the following values
-        if self.year == 1:
-            areas = [7500, 13000, 16000]
-            depths = [24.9, 25.2, 25.5]
-            fom_arr = [
+    # FoM is calculated at the following (areas, depths) for each year;
+    # fom_arr is indexed as [area, depth].
+    _fom_tables = {
+        1: (
+            [7500, 13000, 16000],
+            [24.9, 25.2, 25.5],
+            [
                 [1.212257e02, 1.462689e02, 1.744913e02],
                 [1.930906e02, 2.365094e02, 2.849131e02],
                 [2.316956e02, 2.851547e02, 3.445717e02],
-            ]
-        elif self.year == 3:
-            areas = [10000, 15000, 20000]
-            depths = [25.5, 25.8, 26.1]
-            fom_arr = [
+            ],
+        ),
+        3: (
+            [10000, 15000, 20000],
+            [25.5, 25.8, 26.1],
+            [
                 [1.710645e02, 2.246047e02, 2.431472e02],
                 [2.445209e02, 3.250737e02, 3.516395e02],
                 [3.173144e02, 4.249317e02, 4.595133e02],
-            ]
-
-        elif self.year == 6:
-            areas = [10000, 15000, 2000]
-            depths = [25.9, 26.1, 26.3]
-            fom_arr = [
+            ],
+        ),
+        6: (
+            [10000, 15000, 2000],
+            [25.9, 26.1, 26.3],
+            [
                 [2.346060e02, 2.414678e02, 2.852043e02],
                 [3.402318e02, 3.493120e02, 4.148814e02],
                 [4.452766e02, 4.565497e02, 5.436992e02],
-            ]
-
-        elif self.year == 10:
-            areas = [10000, 15000, 20000]
-            depths = [26.3, 26.5, 26.7]
-            fom_arr = [
+            ],
+        ),
+        10: (
+            [10000, 15000, 20000],
+            [26.3, 26.5, 26.7],
+            [
                 [2.887266e02, 2.953230e02, 3.361616e02],
                 [4.200093e02, 4.292111e02, 4.905306e02],
                 [5.504419e02, 5.624697e02, 6.441837e02],
-            ]
-        else:
+            ],
+        ),
+    }
+
+    def __init__(self, year=10, **kwargs):
+        self.year = year
+        super().__init__(col="metricdata", mask_val=-666, **kwargs)
+        # The FoM tables are fixed, so build the interpolator only once.
+        self._fom_interp = None
+        if year in self._fom_tables:
+            areas, depths, fom_arr = (np.asarray(x, dtype=float) for x in self._fom_tables[year])
+            # RegularGridInterpolator needs ascending grid points.
+            order = np.argsort(areas)
+            self._fom_interp = interpolate.RegularGridInterpolator(
+                (areas[order], depths), fom_arr[order], method="linear"
+            )
+
+    def run(self, data_slice, slice_point=None):
+        if self._fom_interp is None:
             warnings.warn("FoMEmulator is not defined for this year")
             return self.badval
 
+        # derive nside from length of data slice
+        nside = hp.npix2nside(len(data_slice))
+        pix_area = hp.nside2pixarea(nside, degrees=True)
+
+        # Chop off any outliers (and also the masked value)
+        depth = data_slice[self.colname]
+        good = depth > 0
+        # There is no survey to emulate in a completely masked map.
+        if not good.any():
+            return self.badval
+
+        # Calculate area and med depth from
+        area = pix_area * np.count_nonzero(good)
+        median_depth = np.median(depth[good])
+
         # Interpolate FoM to the actual values for this sim
-        areas = [[i] * 3 for i in areas]
-        depths = [depths] * 3
-        f = interpolate.interp2d(areas, depths, fom_arr, bounds_error=False)
-        fom = f(area, median_depth)[0]
+        fom = float(self.run_batch(area, median_depth))
         return fom
 
+    def run_batch(self, area, median_depth):
+        """Calculate the FoM for many (area, median depth) pairs at once.
+
+        Parameters
+        ----------
+        area : `float` or `np.ndarray`
+            Survey area(s), in square degrees.
+        median_depth : `float` or `np.ndarray`
+            Median depth(s) of the survey, broadcast against `area`.
+
+        Returns
+        -------
+        fom : `np.ndarray`
+            The FoM for each pair, with the broadcast shape of the inputs.
+            Values outside the tabulated grid are held at the edge of the grid.
+        """
+        area, median_depth = np.broadcast_arrays(area, median_depth)
+        if self._fom_interp is None:
+            warnings.warn("FoMEmulator is not defined for this year")
+            return np.full(area.shape, self.badval, dtype=float)
+        areas, depths = self._fom_interp.grid
+        points = np.stack(
+            [np.clip(area, areas[0], areas[-1]), np.clip(median_depth, depths[0], depths[-1])], axis=-1
+        )
+        return self._fom_interp(points.reshape(-1, 2)).reshape(area.shape)
+
 
 class TomographicClusteringSigma8biasMetric(BaseMetric):
     """Compute bias on sigma8 due to spurious contamination of density maps.
@@ -242,32 +364,40 @@ class TomographicClusteringSigma8biasMetric(BaseMetric):
         self.power_multiplier = power_multiplier
         self.lmin = lmin
         self.density_tomography_model = density_tomography_model
-        # to compute angular power spectra and total power,
-        # initialize an array of metrics, with the right lmin and lmax.
-        self.totalPowerMetrics = [
-            TotalPowerMetric(lmin=lmin, lmax=lmax, mask_val=self.mask_val)
-            for lmax in density_tomography_model["lmax"]
-        ]
         self.areaThresholdMetric = AreaThresholdMetric(
             lower_threshold=hp.UNSEEN,
             upper_threshold=np.inf,
             mask_val=self.mask_val,
         )
+        # The model Cells only depend on the tomography model and lmin,
+        # so the model total variance in each bin and its (full sky)
+        # Gaussian variance are calculated once here.
+        n_bins = density_tomography_model["lmax"].size
+        self._totalvar_mod = np.zeros(n_bins)
+        self._totalvar_var_fullsky = np.zeros(n_bins)
+        for i in range(n_bins):
+            # get model Cells from polynomial model (in log log space)
+            ells = np.arange(lmin, density_tomography_model["lmax"][i])
+            polynomial_model = np.poly1d(density_tomography_model["poly1d_coefs_loglog"][i, :])
+            cells_model = np.exp(polynomial_model(np.log(ells)))
+            # model variance is sum of cells x (2l+1)
+            self._totalvar_mod[i] = np.sum(cells_model * (2 * ells + 1))
+            # simple model variance of cell based on Gaussian covariance,
+            # summed with weights (2l+1)^2; this is divided by fsky in run.
+            self._totalvar_var_fullsky[i] = np.sum(2 * cells_model**2 * (2 * ells + 1))
 
     def run(self, data_slice, slice_point=None):
-        # need to define an array of bad values for the masked pixels
-        badval_arr = np.repeat(self.badval, len(self.density_tomography_model["lmax"]))
-        # converts the input recarray to an array
-        data_slice_list = [
-            badval_arr if isinstance(x, float) else x for x in data_slice["metricdata"].tolist()
-        ]
-        # should be (nbins, npix)
-        data_slice_arr = np.asarray(data_slice_list, dtype=float).T
-        # hp.mollview(data_slice_arr[0])
-        ### data_slice_arr[data_slice_arr == -666] = hp.UNSEEN  ############
-        data_slice_arr[~np.isfinite(data_slice_arr)] = (
-            hp.UNSEEN
-        )  # need to work with TotalPowerMetric and healpix
+        # Unpack the per-pixel arrays of bin values into (nbins, npix).
+        # Masked pixels hold a single float (the mask value) instead
+        # of an array, and are set to badval in every bin.
+        nbins = len(self.density_tomography_model["lmax"])
+        metric_values = data_slice["metricdata"]
+        has_values = np.array([not isinstance(x, float) for x in metric_values], dtype=bool)
+        data_slice_arr = np.full((nbins, len(metric_values)), self.badval)
+        if has_values.any():
+            data_slice_arr[:, has_values] = np.concatenate(metric_values[has_values]).reshape(-1, nbins).T
+        # need to work with TotalPowerMetric and healpix
+        data_slice_arr[~np.isfinite(data_slice_arr)] = hp.UNSEEN
 
         # measure valid sky fractions and total power
         # (via angular power spectra) in each bin.
@@ -275,30 +405,29 @@ class TomographicClusteringSigma8biasMetric(BaseMetric):
         # original slicer) -- so there is a bit of "rearrangement" that
         # has to happen to be able to pass a np.array with right dtype
         # (i.e. dtype = [("metricdata", float)]) to each call to
-        # the AreaThresholdMetric and TotalPowerMetric `run` methods.
+        # the AreaThresholdMetric `run` method. Each (contiguous) row of
+        # data_slice_arr can simply be viewed with that dtype, without a copy.
         totalsky = 42000
         fskys = np.array(
             [
-                self.areaThresholdMetric.run(np.core.records.fromrecords(x, dtype=[("metricdata", float)]))
-                / totalsky
+                self.areaThresholdMetric.run(x.view(dtype=[("metricdata", float)])) / totalsky
                 for x in data_slice_arr
             ]
         )  # sky fraction
+        # Total power is computed for all bins together, as in
+        # TotalPowerMetric (monopole and dipole removed), but only
+        # transforming up to the largest lmax needed by any bin.
+        nside = hp.npix2nside(data_slice_arr.shape[1])
+        lmax = min(int(np.max(self.density_tomography_model["lmax"])), 3 * nside - 1)
+        maps = _remove_monopole_dipole(data_slice_arr, data_slice_arr != hp.UNSEEN)
+        alms = hp.map2alm(maps, lmax=lmax, pol=False)
         spuriousdensitypowers = (
-            np.array(
-                [
-                    self.totalPowerMetrics[i].run(
-                        np.core.records.fromrecords(x, dtype=[("metricdata", float)])
-                    )
-                    for i, x in enumerate(data_slice_arr)
-                ]
-            )
-            / fskys
+            _alm_total_power(alms, lmax, self.lmin, self.density_tomography_model["lmax"]) / fskys
         )
-        print("spuriousdensitypowers:", spuriousdensitypowers)
-        print("fskys:", fskys)
+        logging.debug("spuriousdensitypowers: %s", spuriousdensitypowers)
+        logging.debug("fskys: %s", fskys)
 
-        def solve_for_multiplicative_factor(spurious_powers, model_cells, fskys, lmin, power_multiplier):
+        def solve_for_multiplicative_factor(spurious_powers, fskys, power_multiplier):
             """
             Infer multiplicative factor sigma8^2 (and uncertainty)
             from the model Cells and observed total powers
@@ -308,31 +437,17 @@ class TomographicClusteringSigma8biasMetric(BaseMetric):
             # measured angular power spectra
             # (spurious measured Cells times power_multiplier)
             # and model ones (polynomial model from CCL).
-            n_bins = model_cells["lmax"].size
+            n_bins = self._totalvar_mod.size
             assert len(spurious_powers) == n_bins
             assert len(fskys) == n_bins
-            assert model_cells["poly1d_coefs_loglog"].shape[0] == n_bins
-            totalvar_mod = np.zeros((n_bins, 1))
-            totalvar_obs = np.zeros((n_bins, 1))
-            totalvar_var = np.zeros((n_bins, 1))
-            # loop over tomographic bins
             # hardcoded; assumed CCL cosmology
-            sigma8square_model = model_cells["sigma8square_model"]
-            for i in range(n_bins):
-                # get model Cells from polynomial model (in log log space)
-                ells = np.arange(lmin, model_cells["lmax"][i])
-                polynomial_model = np.poly1d(model_cells["poly1d_coefs_loglog"][i, :])
-                cells_model = np.exp(polynomial_model(np.log(ells)))
-
-                # model variance is sum of cells x (2l+1)
-                totalvar_mod[i, 0] = np.sum(cells_model * (2 * ells + 1))
-
-                # observations is spurious power  noiseless model
-                totalvar_obs[i, 0] = totalvar_mod[i, 0] + spurious_powers[i] * power_multiplier
-
-                # simple model variance of cell based on Gaussian covariance
-                cells_var = 2 * cells_model**2 / (2 * ells + 1) / fskys[i]
-                totalvar_var[i, 0] = np.sum(cells_var * (2 * ells + 1) ** 2)
+            sigma8square_model = self.density_tomography_model["sigma8square_model"]
+            # model variance is sum of cells x (2l+1), in each tomographic bin
+            totalvar_mod = self._totalvar_mod
+            # observations is spurious power  noiseless model
+            totalvar_obs = totalvar_mod + spurious_powers * power_multiplier
+            # simple model variance of cell based on Gaussian covariance
+            totalvar_var = self._totalvar_var_fullsky / fskys
 
             # model assumed sigma8 = 0.8
             # (add CCL cosmology here? or how I obtained them + documentation)
@@ -345,8 +460,8 @@ class TomographicClusteringSigma8biasMetric(BaseMetric):
 
             # model ratio: formula for posterior distribution on unknown
             # multiplicative factor in multivariate Gaussian likelihood
-            FOT = np.sum(transfers[:, 0] * totalvar_obs[:, 0] / totalvar_var[:, 0])
-            FTT = np.sum(transfers[:, 0] * transfers[:, 0] / totalvar_var[:, 0])
+            FOT = np.sum(transfers * totalvar_obs / totalvar_var)
+            FTT = np.sum(transfers * transfers / totalvar_var)
             # mean and stddev of multiplicative factor
             sigma8square_fit = FOT / FTT
             sigma8square_error = FTT**-0.5
@@ -355,7 +470,7 @@ class TomographicClusteringSigma8biasMetric(BaseMetric):
 
         # solve for the gaussian posterior distribution on sigma8^2
         sigma8square_fit, sigma8square_error, sigma8square_model = solve_for_multiplicative_factor(
-            spuriousdensitypowers, self.density_tomography_model, fskys, self.lmin, self.power_multiplier
+            spuriousdensitypowers, fskys, self.power_multiplier
         )
 
         results_sigma8_square_bias = (sigma8square_fit - sigma8square_model) / sigma8square_error
@@ -370,8 +485,20 @@ class TomographicClusteringSigma8biasMetric(BaseMetric):
             sigma8_model = sigma8square_model**0.5
             sigma8_error = 0.5 * sigma8square_error * sigma8_fit / sigma8square_fit
             results_sigma8_bias = (sigma8_fit - sigma8_model) / sigma8_error
-            print(sigma8square_model, sigma8square_fit, sigma8square_error, results_sigma8_square_bias)
-            print(sigma8_model, sigma8_fit, sigma8_error, results_sigma8_bias)
+            logging.debug(
+                "sigma8^2 model, fit, error, bias: %s %s %s %s",
+                sigma8square_model,
+                sigma8square_fit,
+                sigma8square_error,
+                results_sigma8_square_bias,
+            )
+            logging.debug(
+                "sigma8 model, fit, error, bias: %s %s %s %s",
+                sigma8_model,
+                sigma8_fit,
+                sigma8_error,
+                results_sigma8_bias,
+            )
             return results_sigma8_bias
 
 
@@ -640,6 +767,10 @@ class UniformAreaFoMFractionMetric(BaseMetric):
         self.mask_val = hp.UNSEEN
         self.verbose = verbose
         self.nside = nside
+        # The galactic north/south regions only depend on nside.
+        npix = hp.nside2npix(nside)
+        ngp_mask = _galactic_north_mask(nside)
+        self._region_masks = {"all": np.ones(npix, dtype=bool), "north": ngp_mask, "south": ~ngp_mask}
         names = ["exgal_m5", "riz_exptime"]
         types = [float] * 2
         self.mask_val_arr = np.zeros(1, dtype=list(zip(names, types)))
@@ -657,10 +788,11 @@ class UniformAreaFoMFractionMetric(BaseMetric):
         ]
         data_slice_arr = np.asarray(data_slice_list, dtype=self.mask_val_arr.dtype)
         # a bit of gymnastics to make sure all bad values (nan, -666) are recast as hp.UNSEEN
-        ind = data_slice_arr["riz_exptime"] == -666
-        ind |= ~np.isfinite(data_slice_arr["riz_exptime"])
-        ind = data_slice_arr["exgal_m5"] == -666
-        ind |= ~np.isfinite(data_slice_arr["exgal_m5"])
+        # (in both maps, if either one is bad)
+        ind = np.zeros(data_slice_arr.shape, dtype=bool)
+        for name in ("riz_exptime", "exgal_m5"):
+            values = data_slice_arr[name]
+            ind |= (values == -666) | ~np.isfinite(values)
         data_slice_arr["exgal_m5"][ind.ravel()] = hp.UNSEEN
         data_slice_arr["riz_exptime"][ind.ravel()] = hp.UNSEEN
         # sanity check
@@ -668,36 +800,22 @@ class UniformAreaFoMFractionMetric(BaseMetric):
         assert nside == self.nside
 
         # Let's make code that pulls out the northern/southern galactic regions, and gets statistics of the footprint by region.
-        def _is_ngp(ra, dec):
-            c = SkyCoord(ra=ra * u.degree, dec=dec * u.degree, frame="icrs")
-            lat = c.galactic.b.deg
-            return lat >= 0
-
-        def get_stats_by_region(use_map, nside, maskval=0, region="all"):
-            if region not in ["all", "north", "south"]:
+        def get_stats_by_region(use_map, maskval=0, region="all"):
+            if region not in self._region_masks:
                 raise ValueError("Invalid region %s" % region)
-            to_use = use_map > maskval
-
-            if region != "all":
-                # Find the north/south part of the map as requested
-                npix = hp.nside2npix(nside)
-                ra, dec = hp.pix2ang(hp.npix2nside(npix), range(npix), lonlat=True)
-                ngp_mask = _is_ngp(ra, dec)
-                if region == "north":
-                    reg_mask = ngp_mask
-                else:
-                    reg_mask = ~ngp_mask
-                to_use = to_use & reg_mask
-
-            # Calculate the desired stats
-            reg_mad = median_abs_deviation(use_map[to_use])
-            reg_median = np.median(use_map[to_use])
-            reg_std = np.std(use_map[to_use])
+            to_use = (use_map > maskval) & self._region_masks[region]
+
+            # Calculate the desired stats (MAD is unscaled, as
+            # in scipy.stats.median_abs_deviation)
+            values = use_map[to_use]
+            reg_median = np.median(values)
+            reg_mad = np.median(np.abs(values - reg_median))
+            reg_std = np.std(values)
 
             # Return the values
             return (reg_mad, reg_median, reg_std)
 
-        def has_stripes(data_slice, nside, threshold=0.1):
+        def has_stripes(data_slice, threshold=0.1):
             """
             A utility to find whether a particular routine has stripey features in the exposure time map.
             """
@@ -707,7 +825,7 @@ class UniformAreaFoMFractionMetric(BaseMetric):
             frac_scatter = {}
             regions = ["north", "south"]
             for region in regions:
-                mad[region], med[region], _ = get_stats_by_region(data_slice, nside, region=region)
+                mad[region], med[region], _ = get_stats_by_region(data_slice, region=region)
                 frac_scatter[region] = mad[region] / med[region]
             test_statistic = np.abs(frac_scatter["north"] / frac_scatter["south"] - 1)
             if test_statistic < threshold:
@@ -736,15 +854,14 @@ class UniformAreaFoMFractionMetric(BaseMetric):
             # A routine to get some statistics of the clustering: area fractions, median map values
             expanded_labels = expand_labels(depth_map, labels, maskval=maskval)
             cutval = maskval + 0.1
+            valid = depth_map > cutval
+            n_valid = np.count_nonzero(valid)
             area_frac = []
             med_val = []
             for i in range(n_clusters):
-                new_map = depth_map.copy()
-                new_map[expanded_labels != i + 1] = maskval
-                this_area_frac = len(new_map[new_map > cutval]) / len(depth_map[depth_map > cutval])
-                this_med_val = np.median(new_map[new_map > cutval])
-                area_frac.append(this_area_frac)
-                med_val.append(this_med_val)
+                in_cluster = valid & (expanded_labels == i + 1)
+                area_frac.append(np.count_nonzero(in_cluster) / n_valid)
+                med_val.append(np.median(depth_map[in_cluster]))
             return area_frac, med_val
 
         def show_clusters(depth_map, labels, maskval=0, n_clusters=2, min=500, max=3000):
@@ -768,33 +885,24 @@ class UniformAreaFoMFractionMetric(BaseMetric):
             #   That's why priority_fac is a tunable parameter; it should be between 0 and 1
             if priority_fac < 0 or priority_fac >= 1:
                 raise ValueError("priority_fac must lie between 0 and 1")
-            theta, phi = hp.pixelfunc.pix2ang(nside, ipix=np.arange(hp.nside2npix(nside)))
-            # theta is 0 at the north pole, pi/2 at equator, pi at south pole; phi maps to RA
-            ra = np.rad2deg(phi)
-            dec = np.rad2deg(0.5 * np.pi - theta)
+            ra, dec = _pix_ra_dec(nside)
 
             # Make a 3D numpy array containing the unmasked regions, including a rescaling factor to prioritize the depth
-            n_unmasked = len(depth_map[depth_map > 0.1])
-            my_data = np.zeros((n_unmasked, 3))
             cutval = 0.1 + maskval
-            my_data[:, 0] = (
-                ra[depth_map > cutval]
-                * (1 - priority_fac)
-                * np.std(depth_map[depth_map > cutval])
-                / np.std(ra[depth_map > cutval])
-            )
-            my_data[:, 1] = (
-                dec[depth_map > cutval]
-                * (1 - priority_fac)
-                * np.std(depth_map[depth_map > cutval])
-                / np.std(dec[depth_map > cutval])
-            )
-            my_data[:, 2] = depth_map[depth_map > cutval]
+            unmasked = depth_map > cutval
+            depth = depth_map[unmasked]
+            ra = ra[unmasked]
+            dec = dec[unmasked]
+            depth_std = np.std(depth)
+            my_data = np.empty((depth.size, 3))
+            my_data[:, 0] = ra * (1 - priority_fac) * depth_std / np.std(ra)
+            my_data[:, 1] = dec * (1 - priority_fac) * depth_std / np.std(dec)
+            my_data[:, 2] = depth
             return my_data
 
         # Check for stripiness
         use_threshold = 0.7 / self.year
-        stripes = has_stripes(data_slice_arr["riz_exptime"].ravel(), nside, threshold=use_threshold)
+        stripes = has_stripes(data_slice_arr["riz_exptime"].ravel(), threshold=use_threshold)
 
         if not stripes:
             return 1
@@ -820,13 +928,14 @@ class UniformAreaFoMFractionMetric(BaseMetric):
             my_hpid_2 = expanded_labels == 2  # np.where(expanded_labels == 2)[0]
             # should this be labels or expanded_labels?!
 
-            # copies need to be recarrays
-            data_slice_subset_2 = deepcopy(data_slice_arr)
-            data_slice_subset_1 = deepcopy(data_slice_arr)
-            data_slice_subset_1[my_hpid_2] = self.mask_val_arr
-            data_slice_subset_2[my_hpid_1] = self.mask_val_arr
-            fom1 = self.threebyTwoSummary.run(data_slice_subset_1)
-            fom2 = self.threebyTwoSummary.run(data_slice_subset_2)
+            # one copy serves both regions: mask region 2 for fom1,
+            # then restore it and mask region 1 for fom2
+            data_slice_subset = data_slice_arr.copy()
+            data_slice_subset[my_hpid_2] = self.mask_val_arr
+            fom1 = self.threebyTwoSummary.run(data_slice_subset)
+            data_slice_subset[my_hpid_2] = data_slice_arr[my_hpid_2]
+            data_slice_subset[my_hpid_1] = self.mask_val_arr
+            fom2 = self.threebyTwoSummary.run(data_slice_subset)
             fom = np.max((fom1, fom2))
             fom_total = self.threebyTwoSummary.run(data_slice_arr)
             if self.verbose:
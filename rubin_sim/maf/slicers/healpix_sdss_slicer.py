@@ -1,10 +1,8 @@
 __all__ = ("HealpixSDSSSlicer",)
 
-from functools import wraps
-
-import matplotlib.path as mplPath
 import numpy as np
-from rubin_scheduler.utils import _xyz_from_ra_dec, gnomonic_project_toxy
+from rubin_scheduler.utils import _xyz_from_ra_dec
+from scipy.spatial import cKDTree
 
 from rubin_sim.maf.plots import HealpixSDSSSkyMap
 
@@ -43,72 +41,106 @@ class HealpixSDSSSlicer(HealpixSlicer):
     def setup_slicer(self, sim_data, maps=None):
         """
         Use sim_data[self.lon_col] and sim_data[self.lat_col]
-        (in radians) to set up KDTree.
+        (in radians) to match each image to the slice_points
+        which fall inside its corners.
         """
         self._run_maps(maps)
-        self._build_tree(sim_data[self.lon_col], sim_data[self.lat_col], self.leafsize)
         self._set_rad(self.radius)
-        self.corners = sim_data[self.cornerLables]
-
-        @wraps(self._slice_sim_data)
-        def _slice_sim_data(islice):
-            """Return indexes for relevant opsim data at slice_point
-            (slice_point=lon_col/lat_col value .. usually ra/dec)."""
-            sx, sy, sz = _xyz_from_ra_dec(self.slice_points["ra"][islice], self.slice_points["dec"][islice])
-            # Query against tree.
-            initIndices = self.opsimtree.query_ball_point((sx, sy, sz), self.rad)
-            # Loop through all the images and check if the slice_point is inside the corners of the chip
-            indices = []
-            # Gnomic project all the corners that are near the slice point, centered on slice point
-            x1, y1 = gnomonic_project_toxy(
-                self.corners["RA1"][initIndices],
-                self.corners["Dec1"][initIndices],
-                self.slice_points["ra"][islice],
-                self.slice_points["dec"][islice],
-            )
-            x2, y2 = gnomonic_project_toxy(
-                self.corners["RA2"][initIndices],
-                self.corners["Dec2"][initIndices],
-                self.slice_points["ra"][islice],
-                self.slice_points["dec"][islice],
-            )
-            x3, y3 = gnomonic_project_toxy(
-                self.corners["RA3"][initIndices],
-                self.corners["Dec3"][initIndices],
-                self.slice_points["ra"][islice],
-                self.slice_points["dec"][islice],
+        if np.any(np.abs(sim_data[self.lon_col]) > np.pi * 2.0) or np.any(
+            np.abs(sim_data[self.lat_col]) > np.pi * 2.0
+        ):
+            raise ValueError("Expecting RA and Dec values to be in radians.")
+        # The key corner of each image. Only trees over blocks of these
+        # are needed (below), so no tree of all the images is built.
+        key_xyz = np.column_stack(_xyz_from_ra_dec(sim_data[self.lon_col], sim_data[self.lat_col]))
+        # Corners as contiguous (4, nimages) arrays of RA and Dec
+        ra = np.stack([sim_data[col] for col in self.cornerLables[0::2]])
+        dec = np.stack([sim_data[col] for col in self.cornerLables[1::2]])
+        sin_dec = np.sin(dec)
+        cos_dec = np.cos(dec)
+        # A cap around each image which contains all of it: centered on
+        # the (normalized) mean of the corners, with the chord to the
+        # farthest corner (padded for roundoff) as its radius.
+        corner_xyz = np.array(_xyz_from_ra_dec(ra, dec))
+        centers = corner_xyz.mean(axis=1)
+        centers /= np.sqrt((centers**2).sum(axis=0))
+        cap_rad2 = ((corner_xyz - centers[:, np.newaxis, :]) ** 2).sum(axis=0).max(axis=0) * (1 + 1e-6)
+        centers = np.ascontiguousarray(centers.T)
+        # Invert the search: query a tree of the slice_points with the
+        # key corner of each image, rather than the other way around,
+        # so the point-in-image tests are all done here in one pass.
+        # The tree is only needed here, so it is not kept on the slicer.
+        xyz = np.column_stack(_xyz_from_ra_dec(self.slice_points["ra"], self.slice_points["dec"]))
+        slicetree = cKDTree(xyz, leafsize=self.leafsize, balanced_tree=False, compact_nodes=False)
+        nimages = len(key_xyz)
+        block_size = 10000
+        sids = []
+        idxs = []
+        # Work through the images in blocks to bound the memory used
+        # by the image / slice_point pairs at high nside.
+        for start in range(0, nimages, block_size):
+            # Find all the (image, slice_point) pairs within the radius
+            # in one dual-tree traversal of a tree of the block's images
+            # against the slice_point tree.
+            blocktree = cKDTree(key_xyz[start : start + block_size], leafsize=self.leafsize)
+            pairs = blocktree.sparse_distance_matrix(slicetree, self.rad, output_type="ndarray")
+            if len(pairs) == 0:
+                continue
+            idx = pairs["i"] + start
+            sid = pairs["j"]
+            # Most candidates are within the radius of the key corner
+            # but nowhere near the image, so drop any slice point
+            # outside the image's cap before projecting.
+            near = ((slicetree.data[sid] - centers[idx]) ** 2).sum(axis=1) <= cap_rad2[idx]
+            sid, idx = sid[near], idx[near]
+            # Gnomic project the corners of each image, centered on each
+            # candidate slice point. This is gnomonic_project_toxy written
+            # out so the sin/cos of the corner decs are only taken once.
+            sin_dec1 = sin_dec[:, idx]
+            cos_dec1 = cos_dec[:, idx]
+            dra = ra[:, idx] - self.slice_points["ra"][sid]
+            cos_dra = np.cos(dra)
+            sin_dec0 = np.sin(self.slice_points["dec"][sid])
+            cos_dec0 = np.cos(self.slice_points["dec"][sid])
+            cosc = sin_dec0 * sin_dec1 + cos_dec0 * cos_dec1 * cos_dra
+            x0 = cos_dec1 * np.sin(dra) / cosc
+            y0 = (cos_dec0 * sin_dec1 - sin_dec0 * cos_dec1 * cos_dra) / cosc
+            # Most of the candidate images do not reach the slice point,
+            # so only keep those whose bounding box contains the origin
+            in_box = (
+                (x0.min(axis=0) <= 0) & (x0.max(axis=0) >= 0) & (y0.min(axis=0) <= 0) & (y0.max(axis=0) >= 0)
             )
-            x4, y4 = gnomonic_project_toxy(
-                self.corners["RA4"][initIndices],
-                self.corners["Dec4"][initIndices],
-                self.slice_points["ra"][islice],
-                self.slice_points["dec"][islice],
-            )
-
-            for i, ind in enumerate(initIndices):
-                # Use matplotlib to make a polygon on
-                bbPath = mplPath.Path(
-                    np.array(
-                        [
-                            [x1[i], y1[i]],
-                            [x2[i], y2[i]],
-                            [x3[i], y3[i]],
-                            [x4[i], y4[i]],
-                            [x1[i], y1[i]],
-                        ]
-                    )
-                )
-                # Check if the slice_point is inside the image corners and append to list if it is
-                if bbPath.contains_point((0.0, 0.0)) == 1:
-                    indices.append(ind)
-
-            return {
-                "idxs": indices,
-                "slice_point": {
-                    "sid": self.slice_points["sid"][islice],
-                    "ra": self.slice_points["ra"][islice],
-                    "dec": self.slice_points["dec"][islice],
-                },
-            }
+            x0, y0, sid, idx = x0[:, in_box], y0[:, in_box], sid[in_box], idx[in_box]
+            # Check if the slice_point (the origin) is inside each image,
+            # using the same crossings test as matplotlib's contains_point
+            x1 = np.roll(x0, -1, axis=0)
+            y1 = np.roll(y0, -1, axis=0)
+            yflag0 = y0 >= 0
+            yflag1 = y1 >= 0
+            crossings = (yflag0 != yflag1) & ((y1 * (x0 - x1) >= x1 * (y0 - y1)) == yflag1)
+            inside = np.logical_xor.reduce(crossings, axis=0)
+            sids.append(sid[inside])
+            idxs.append(idx[inside])
+        sids = np.concatenate(sids) if sids else np.array([], dtype=int)
+        idxs = np.concatenate(idxs) if idxs else np.array([], dtype=int)
+        # Group the matching images by slice_point, so the images
+        # for slice_point islice are
+        # self._idxs[self._offsets[islice] : self._offsets[islice + 1]]
+        order = np.lexsort((idxs, sids))
+        self._idxs = idxs[order]
+        self._offsets = np.zeros(self.nslice + 1, dtype=int)
+        np.cumsum(np.bincount(sids, minlength=self.nslice), out=self._offsets[1:])
 
-        setattr(self, "_slice_sim_data", _slice_sim_data)
+    def _slice_sim_data(self, islice):
+        """Return indexes for relevant opsim data at slice_point
+        (slice_point=lon_col/lat_col value .. usually ra/dec)."""
+        offsets = self._offsets
+        slice_points = self.slice_points
+        return {
+            "idxs": self._idxs[offsets[islice] : offsets[islice + 1]].tolist(),
+            "slice_point": {
+                "sid": slice_points["sid"][islice],
+                "ra": slice_points["ra"][islice],
+                "dec": slice_points["dec"][islice],
+            },
+        }
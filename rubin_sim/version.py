@@ -0,0 +1,3 @@
+# Generated by setuptools_scm
+__all__ = ["__version__"]
+__version__ = "0.1.dev1+g202ba1e"
@@ -1,9 +1,11 @@
 import unittest
+from unittest.mock import patch
 
 import healpy as hp
 import numpy as np
 
 import rubin_sim.maf.metrics as metrics
+from rubin_sim.maf.metrics import cosmology_summary_metrics
 
 
 class TestCosmologySummaryMetrics(unittest.TestCase):
@@ -14,6 +16,114 @@ class TestCosmologySummaryMetrics(unittest.TestCase):
         metric = metrics.TotalPowerMetric(col="testcol")
         result = metric.run(data)
         np.testing.assert_equal(result, 0.0)
+        # A completely masked map has no power
+        data["testcol"] = np.nan
+        result = metric.run(data)
+        np.testing.assert_equal(result, 0.0)
+
+    def test_sigma8_bias_metric(self):
+        nside = 32
+        npix = hp.nside2npix(nside)
+        model = metrics.DENSITY_TOMOGRAPHY_MODEL["year10"]
+        nbins = len(model["lmax"])
+        rng = np.random.default_rng(11)
+        maps = rng.normal(0.0, 0.1, (nbins, npix))
+        theta, _ = hp.pix2ang(nside, np.arange(npix))
+        footprint = theta > np.radians(60)
+        maps[:, ~footprint] = hp.UNSEEN
+        # Some bins have their own masks, so the monopole/dipole fit
+        # is done per bin for those maps.
+        maps[1, footprint & (rng.uniform(size=npix) < 0.1)] = hp.UNSEEN
+        maps[3, footprint & (theta > np.radians(150))] = hp.UNSEEN
+        data = np.empty(npix, dtype=[("metricdata", object)])
+        for i in range(npix):
+            data["metricdata"][i] = maps[:, i] if footprint[i] else hp.UNSEEN
+        metric = metrics.TomographicClusteringSigma8biasMetric(model)
+        # Capture the spurious power in each bin
+        powers = []
+        alm_total_power = cosmology_summary_metrics._alm_total_power
+
+        def total_power(*args):
+            powers.append(alm_total_power(*args))
+            return powers[-1]
+
+        with patch.object(cosmology_summary_metrics, "_alm_total_power", side_effect=total_power):
+            result = metric.run(data)
+        self.assertTrue(np.isfinite(result))
+        # The batched powers match TotalPowerMetric run on each bin
+        # (up to the transforms being truncated at different lmax)
+        for i in range(nbins):
+            row = np.zeros(npix, dtype=[("metricdata", float)])
+            row["metricdata"] = maps[i]
+            expected = metrics.TotalPowerMetric(lmin=metric.lmin, lmax=model["lmax"][i], mask_val=hp.UNSEEN)
+            np.testing.assert_allclose(powers[0][i], expected.run(row), rtol=2e-3)
+
+    def test_static_probes_fom_simple(self):
+        nside = 64
+        pix_area = hp.nside2pixarea(nside, degrees=True)
+        data = np.zeros(hp.nside2npix(nside), dtype=list(zip(["metricdata"], ["float"])))
+        data["metricdata"] = -666
+        # 15000 sq deg at the middle depth of the year 10 grid
+        npix_good = int(round(15000 / pix_area))
+        data["metricdata"][:npix_good] = 26.5
+        metric = metrics.StaticProbesFoMEmulatorMetricSimple(year=10)
+        result = metric.run(data)
+        np.testing.assert_allclose(result, 4.292111e02, rtol=1e-3)
+        # Depths beyond the grid are held at the edge of the grid
+        data["metricdata"][:npix_good] = 28.0
+        result = metric.run(data)
+        np.testing.assert_allclose(result, 4.905306e02, rtol=1e-3)
+        # Batched evaluation on the grid points
+        results = metric.run_batch(np.array([10000, 15000, 20000]), 26.3)
+        np.testing.assert_allclose(results, [2.887266e02, 4.200093e02, 5.504419e02])
+        self.assertEqual(metric.run_batch(15000, 26.3).shape, ())
+        # A completely masked map
+        data["metricdata"] = -666
+        self.assertEqual(metric.run(data), metric.badval)
+        metric = metrics.StaticProbesFoMEmulatorMetricSimple(year=2)
+        with self.assertWarns(UserWarning):
+            result = metric.run(data)
+        self.assertEqual(result, metric.badval)
+
+    def test_uniform_area_fom_fraction_mask(self):
+        nside = 16
+        npix = hp.nside2npix(nside)
+        metric = cosmology_summary_metrics.UniformAreaFoMFractionMetric(year=10, nside=nside, verbose=False)
+        theta, phi = hp.pix2ang(nside, np.arange(npix))
+        dec = 90.0 - np.degrees(theta)
+        ngp = hp.Rotator(coord=["C", "G"])(theta, phi)[0] < np.pi / 2
+        # Exposure times with a small scatter in the north and stripes
+        # in the south, so has_stripes finds the stripes and the
+        # clustering and the FoMs are run.
+        rng = np.random.default_rng(42)
+        riz_exptime = np.where(ngp, 1000.0, np.where(np.sin(np.radians(dec) * 10) > 0, 600.0, 1400.0))
+        riz_exptime += rng.normal(0, 10, npix)
+        data = np.empty(npix, dtype=[("metricdata", object)])
+        for i in range(npix):
+            value = np.zeros(1, dtype=metric.mask_val_arr.dtype)
+            value["exgal_m5"] = 26.0
+            value["riz_exptime"] = riz_exptime[i]
+            data["metricdata"][i] = value
+        # Bad exposure times, but valid depths
+        bad = [np.flatnonzero(ngp)[0], np.flatnonzero(~ngp)[0]]
+        data["metricdata"][bad[0]]["riz_exptime"] = -666
+        data["metricdata"][bad[1]]["riz_exptime"] = np.nan
+        calls = []
+
+        def fom(data_slice):
+            calls.append(data_slice.copy())
+            return float(np.count_nonzero(data_slice["exgal_m5"] != hp.UNSEEN))
+
+        with patch.object(metric.threebyTwoSummary, "run", side_effect=fom):
+            result = metric.run(data)
+        # fom1, fom2 and the FoM of the full footprint
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(0 < result < 1)
+        # Pixels with a bad exposure time are masked in both maps
+        for data_slice in calls:
+            np.testing.assert_equal(data_slice["exgal_m5"][bad].ravel(), hp.UNSEEN)
+            np.testing.assert_equal(data_slice["riz_exptime"][bad].ravel(), hp.UNSEEN)
+        self.assertEqual(np.count_nonzero(calls[-1]["exgal_m5"] == hp.UNSEEN), len(bad))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import matplotlib
+
+matplotlib.use("Agg")
+import unittest
+
+import healpy as hp
+import matplotlib.path as mplPath
+import numpy as np
+from rubin_scheduler.utils import gnomonic_project_toxy
+
+from rubin_sim.maf.slicers import HealpixSDSSSlicer
+
+
+def make_images(nimages=200, random=42):
+    """Make a set of small rectangular images along the equator,
+    some of which straddle RA=0."""
+    rng = np.random.RandomState(random)
+    ra = np.radians(rng.uniform(-3.0, 3.0, nimages) % 360)
+    dec = np.radians(rng.uniform(-1.0, 1.0, nimages))
+    half_width = np.radians(0.11)
+    half_height = np.radians(0.075)
+    dx = np.array([-half_width, half_width, half_width, -half_width])
+    dy = np.array([-half_height, -half_height, half_height, half_height])
+    names = ["RA1", "Dec1", "RA2", "Dec2", "RA3", "Dec3", "RA4", "Dec4"]
+    data = np.zeros(nimages, dtype=list(zip(names, [float] * 8)))
+    for k in range(4):
+        data["Dec%d" % (k + 1)] = dec + dy[k]
+        data["RA%d" % (k + 1)] = (ra + dx[k] / np.cos(dec + dy[k])) % (2 * np.pi)
+    return data
+
+
+class TestHealpixSDSSSlicer(unittest.TestCase):
+    def setUp(self):
+        self.nside = 256
+        self.data = make_images()
+        self.slicer = HealpixSDSSSlicer(nside=self.nside, verbose=False)
+        self.slicer.setup_slicer(self.data)
+
+    def test_slicing(self):
+        """Compare against checking every image directly."""
+        ra, dec = self.slicer.slice_points["ra"], self.slicer.slice_points["dec"]
+        ra_dist = np.minimum(ra, 2 * np.pi - ra)
+        near = np.where((np.abs(dec) < np.radians(1.2)) & (ra_dist < np.radians(3.3)))[0]
+        nmatched = 0
+        for islice in near:
+            x, y = gnomonic_project_toxy(
+                np.array([self.data["RA%d" % k] for k in range(1, 5)]),
+                np.array([self.data["Dec%d" % k] for k in range(1, 5)]),
+                ra[islice],
+                dec[islice],
+            )
+            expected = [
+                i
+                for i in range(len(self.data))
+                if mplPath.Path(np.array([x[:, i], y[:, i]]).T).contains_point((0.0, 0.0))
+            ]
+            idxs = self.slicer[islice]["idxs"]
+            self.assertEqual(sorted(idxs), expected)
+            nmatched += len(idxs)
+        self.assertTrue(nmatched > 0)
+        # Slice points far from any image have no data
+        islice = hp.ang2pix(self.nside, np.pi / 4.0, np.pi)
+        self.assertEqual(self.slicer[islice]["idxs"], [])
+        self.assertEqual(self.slicer[islice]["slice_point"]["sid"], islice)
+
+
+if __name__ == "__main__":
+    unittest.main()
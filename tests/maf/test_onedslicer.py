@@ -222,6 +222,43 @@ class TestOneDSlicerSlicing(unittest.TestCase):
         for i, s in enumerate(self.testslicer):
             self.assertEqual(len(s["idxs"]), nvalues / float(nbins) / 2.0)
 
+    def test_uniform_bin_slicing(self):
+        """Test slicing with bin_size matches slicing with the same
+        explicit bins, including values on the bin edges and NaNs."""
+        rng = np.random.RandomState(42)
+        values = np.round(rng.uniform(-1, 25, 5000), 1)
+        values[::50] = np.nan
+        dv = np.array(list(zip(values)), dtype=[("testdata", "float")])
+        for bin_size, bin_min, bin_max in [(2, None, None), (0.2, 0, 20), (np.radians(0.2), 0, 0.35)]:
+            uniform_slicer = OneDSlicer(
+                slice_col_name="testdata", bin_size=bin_size, bin_min=bin_min, bin_max=bin_max
+            )
+            uniform_slicer.setup_slicer(dv)
+            bins_slicer = OneDSlicer(slice_col_name="testdata", bins=uniform_slicer.bins)
+            bins_slicer.setup_slicer(dv)
+            self.assertEqual(uniform_slicer.nslice, bins_slicer.nslice)
+            for s1, s2 in zip(uniform_slicer, bins_slicer):
+                np.testing.assert_array_equal(np.sort(s1["idxs"]), np.sort(s2["idxs"]))
+        # A large offset compared with the bin size, where the spacing
+        # of the bin edges drifts from bin_size by several bins
+        values = rng.uniform(1e9, 1e9 + 100, 100000)
+        dv = np.array(list(zip(values)), dtype=[("testdata", "float")])
+        uniform_slicer = OneDSlicer(slice_col_name="testdata", bin_size=1e-3, bin_min=1e9, bin_max=1e9 + 100)
+        uniform_slicer.setup_slicer(dv)
+        bins_slicer = OneDSlicer(slice_col_name="testdata", bins=uniform_slicer.bins)
+        bins_slicer.setup_slicer(dv)
+        self.assertEqual(uniform_slicer.nslice, bins_slicer.nslice)
+        ibins = []
+        for slicer in (uniform_slicer, bins_slicer):
+            ibin = np.full(len(values), -1)
+            for islice, idxs in enumerate(slicer.sim_idxs):
+                ibin[idxs] = islice
+            ibins.append(ibin)
+        np.testing.assert_array_equal(ibins[0], ibins[1])
+        in_bins = ibins[0] >= 0
+        self.assertTrue(np.all(values[in_bins] >= uniform_slicer.bins[ibins[0][in_bins]]))
+        self.assertTrue(np.all(values[in_bins] < uniform_slicer.bins[ibins[0][in_bins] + 1]))
+
     def test_night_slicing(self):
         """Test slicing with 'night' column"""
         numval = 1000